@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-15 20:03
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_summary_fields(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    Equipment = apps.get_model('api', 'Equipment')
+    for dataset in Dataset.objects.all():
+        equipment = Equipment.objects.filter(dataset=dataset)
+        stats = equipment.aggregate(
+            avg_flowrate=Avg('flowrate'),
+            avg_pressure=Avg('pressure'),
+            avg_temperature=Avg('temperature')
+        )
+        type_counts = equipment.values('type').annotate(count=Count('type')).order_by('type')
+        dataset.type_distribution = {item['type']: item['count'] for item in type_counts}
+        dataset.avg_flowrate = stats['avg_flowrate']
+        dataset.avg_pressure = stats['avg_pressure']
+        dataset.avg_temperature = stats['avg_temperature']
+        dataset.save(update_fields=['avg_flowrate', 'avg_pressure', 'avg_temperature', 'type_distribution'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_equipment_dataset_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_flowrate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_pressure',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_temperature',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='type_distribution',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_summary_fields, migrations.RunPython.noop),
+    ]
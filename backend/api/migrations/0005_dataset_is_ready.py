@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 20:11
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    # Datasets uploaded before this field existed were ingested in the request
+    Dataset = apps.get_model('api', 'Dataset')
+    Dataset.objects.update(is_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_dataset_summary_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='is_ready',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
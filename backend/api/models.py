@@ -1,19 +1,43 @@
 from django.db import models
+import uuid
 
 class Dataset(models.Model):
     upload_date = models.DateTimeField(auto_now_add=True)
     filename = models.CharField(max_length=255)
+    # Summary stats, stored by the ingest task once all rows are in
+    avg_flowrate = models.FloatField(null=True, blank=True)
+    avg_pressure = models.FloatField(null=True, blank=True)
+    avg_temperature = models.FloatField(null=True, blank=True)
+    type_distribution = models.JSONField(default=dict, blank=True)
+    # Set in the same transaction as the stats, once every row is committed
+    is_ready = models.BooleanField(default=False)
 
     def __str__(self):
         return f"{self.filename} ({self.upload_date})"
 
 class Equipment(models.Model):
-    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='equipment')
+    # Covered by the (dataset, id) index below, so no separate FK index
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='equipment', db_index=False)
     name = models.CharField(max_length=255)
     type = models.CharField(max_length=100)
     flowrate = models.FloatField()
     pressure = models.FloatField()
     temperature = models.FloatField()
 
+    class Meta:
+        # Rows are always read per dataset in id order
+        indexes = [models.Index(fields=['dataset', 'id'], name='equipment_dataset_id_idx')]
+
     def __str__(self):
         return f"{self.name} - {self.type}"
+
+class CachedFile(models.Model):
+    # Generated report; file stays empty until the worker has written it
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='reports')
+    file = models.FileField(upload_to='reports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Report {self.id} for {self.dataset}"
@@ -0,0 +1,72 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+from xml.sax.saxutils import escape
+from .summary import get_dataset_summary
+
+# Styles are identical for every report, so build them once at import
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+_STATS_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_EQ_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+])
+
+def build_pdf_report(dataset, output):
+    summary = get_dataset_summary(dataset)
+    top20 = list(dataset.equipment.order_by('id').values_list(
+        'name', 'type', 'flowrate', 'pressure', 'temperature'
+    )[:20])
+
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = _SAMPLE_STYLES
+    elements = []
+
+    # Title
+    # Paragraph parses its text as markup, and the filename comes from the upload
+    elements.append(Paragraph(f"Parameter Report: {escape(dataset.filename)}", styles['Title']))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(f"Upload Date: {dataset.upload_date}", styles['Normal']))
+    elements.append(Spacer(1, 24))
+
+    # Summary Stats
+    elements.append(Paragraph("Summary Statistics", styles['Heading2']))
+    stats_data = [
+        ['Parameter', 'Average Value'],
+        ['Flowrate', f"{summary['avg_flowrate']:.2f}"],
+        ['Pressure', f"{summary['avg_pressure']:.2f}"],
+        ['Temperature', f"{summary['avg_temperature']:.2f}"]
+    ]
+    t_stats = Table(stats_data)
+    t_stats.setStyle(_STATS_STYLE)
+    elements.append(t_stats)
+    elements.append(Spacer(1, 24))
+
+    # Equipment List (Top 20 for brevity)
+    elements.append(Paragraph("Equipment Data (Top 20)", styles['Heading2']))
+    eq_data = [['Name', 'Type', 'Flow', 'Press.', 'Temp.']]
+    eq_data.extend(
+        [name, type_, f"{flowrate}", f"{pressure}", f"{temperature}"]
+        for name, type_, flowrate, pressure, temperature in top20
+    )
+
+    t_eq = Table(eq_data)
+    t_eq.setStyle(_EQ_STYLE)
+    elements.append(t_eq)
+
+    doc.build(elements)
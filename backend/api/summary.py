@@ -0,0 +1,67 @@
+from django.core.cache import cache
+import time
+
+# Equipment rows never change after ingest, so the serialized rows can be
+# reused until the ingest task invalidates them
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+# Used as the ETag for summary and history responses
+DATASETS_VERSION_KEY = 'datasets-version'
+
+# Model fields and the keys the frontend expects for them, as in EquipmentSerializer
+EQUIPMENT_DATA_FIELDS = ('name', 'type', 'flowrate', 'pressure', 'temperature')
+EQUIPMENT_KEYS = ('Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature')
+
+def data_cache_key(dataset_id):
+    return f'summary-data:{dataset_id}'
+
+def datasets_version():
+    # Changes whenever a dataset is added or finishes ingesting. It starts
+    # from the clock so a cleared cache can't repeat a version a client holds.
+    return cache.get_or_set(DATASETS_VERSION_KEY, time.time_ns, None)
+
+def invalidate_dataset_summary(dataset_id):
+    cache.delete(data_cache_key(dataset_id))
+    cache.set(DATASETS_VERSION_KEY, time.time_ns(), None)
+
+def build_summary(dataset):
+    # Stats are stored on the dataset at ingest, so this needs no queries
+    return {
+        'id': dataset.id,
+        'filename': dataset.filename,
+        'upload_date': dataset.upload_date,
+        'avg_flowrate': dataset.avg_flowrate or 0,
+        'avg_pressure': dataset.avg_pressure or 0,
+        'avg_temperature': dataset.avg_temperature or 0,
+        'type_distribution': dataset.type_distribution
+    }
+
+def serialize_equipment(equipment):
+    # Built from plain tuples rather than running the serializer's
+    # per-field machinery on every row
+    rows = equipment.values_list(*EQUIPMENT_DATA_FIELDS)
+    return [dict(zip(EQUIPMENT_KEYS, row)) for row in rows]
+
+def get_dataset_data(dataset, limit=None):
+    # A bounded slice is cheap to query directly; only the full list is cached
+    if limit is not None:
+        return serialize_equipment(dataset.equipment.order_by('id')[:limit])
+
+    # Until the ingest commits, the rows read here may be incomplete and a
+    # set racing the task's invalidation would outlive it
+    if not dataset.is_ready:
+        return serialize_equipment(dataset.equipment.order_by('id'))
+
+    return cache.get_or_set(
+        data_cache_key(dataset.id),
+        lambda: serialize_equipment(dataset.equipment.order_by('id')),
+        SUMMARY_CACHE_TIMEOUT
+    )
+
+def get_dataset_summary(dataset, include_data=False, data_limit=None):
+    summary = build_summary(dataset)
+
+    if include_data:
+        summary['data'] = get_dataset_data(dataset, data_limit)
+
+    return summary
@@ -0,0 +1,168 @@
+from celery import shared_task
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from .models import CachedFile, Dataset, Equipment
+from .reports import build_pdf_report
+from .summary import invalidate_dataset_summary
+from collections import Counter
+from datetime import timedelta
+import pandas as pd
+import io
+import itertools
+import tempfile
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+# Rows held in memory per read_csv chunk, and rows per INSERT statement.
+# Capping the INSERT size keeps large uploads under the database's
+# statement/packet limits.
+CSV_CHUNK_SIZE = 50_000
+INSERT_BATCH_SIZE = 1000
+
+REPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# A report still pending after this long was lost: queueing it failed or the
+# worker died before it could record an error
+REPORT_TIMEOUT = timedelta(minutes=10)
+REPORT_TIMEOUT_ERROR = 'Report generation timed out'
+
+# Equipment model fields matching the dataset id followed by REQUIRED_COLUMNS
+EQUIPMENT_FIELDS = ['dataset', 'name', 'type', 'flowrate', 'pressure', 'temperature']
+
+# CSV columns averaged at ingest, and the Dataset fields they are stored in
+STAT_FIELDS = {
+    'Flowrate': 'avg_flowrate',
+    'Pressure': 'avg_pressure',
+    'Temperature': 'avg_temperature',
+}
+
+# Explicit dtypes skip pandas' type inference. Numeric columns stay float64
+# since they are stored as double precision FloatFields.
+CSV_DTYPES = {
+    'Equipment Name': 'string',
+    'Type': 'category',
+    'Flowrate': 'float64',
+    'Pressure': 'float64',
+    'Temperature': 'float64',
+}
+
+def has_required_columns(file_obj):
+    # Only the header row is parsed; the file is rewound for the next reader
+    header = pd.read_csv(file_obj, nrows=0)
+    file_obj.seek(0)
+    return all(col in header.columns for col in REQUIRED_COLUMNS)
+
+def equipment_table():
+    # Quoted table name and column list, in EQUIPMENT_FIELDS order
+    meta = Equipment._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(meta.get_field(field).column) for field in EQUIPMENT_FIELDS)
+    return quote(meta.db_table), columns
+
+def copy_equipment(chunk, dataset_id):
+    # COPY streams the rows as CSV without building model instances
+    table, columns = equipment_table()
+    sql = f'COPY {table} ({columns}) FROM STDIN WITH CSV'
+
+    buffer = io.StringIO()
+    chunk.assign(dataset_id=dataset_id).to_csv(
+        buffer, index=False, header=False, columns=['dataset_id'] + REQUIRED_COLUMNS
+    )
+    buffer.seek(0)
+
+    # The driver's COPY calls bypass Django's cursor wrapper, so map their
+    # errors to django.db exceptions here as execute() would
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+def insert_equipment(chunk, dataset_id):
+    if connection.vendor == 'postgresql':
+        copy_equipment(chunk, dataset_id)
+        return
+
+    # Plain parameter tuples through executemany, skipping the per-row
+    # Equipment construction that bulk_create needs
+    table, columns = equipment_table()
+    placeholders = ', '.join(['%s'] * len(EQUIPMENT_FIELDS))
+    sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+
+    values = [chunk[col].to_numpy(dtype=object, na_value=None) for col in REQUIRED_COLUMNS]
+    rows = zip(itertools.repeat(dataset_id), *values)
+    with connection.cursor() as cursor:
+        while batch := list(itertools.islice(rows, INSERT_BATCH_SIZE)):
+            cursor.executemany(sql, batch)
+
+def store_dataset_stats(dataset_id, totals, counts, type_counts):
+    averages = totals / counts  # NaN for an empty upload
+    Dataset.objects.filter(pk=dataset_id).update(
+        is_ready=True,
+        type_distribution={type_: int(count) for type_, count in sorted(type_counts.items())},
+        **{
+            field: None if pd.isna(averages[col]) else float(averages[col])
+            for col, field in STAT_FIELDS.items()
+        }
+    )
+
+@shared_task
+def process_csv_upload(path, dataset_id):
+    try:
+        # Read in bounded chunks so memory doesn't grow with the file size;
+        # the atomic block keeps a failed upload from leaving partial rows
+        with default_storage.open(path) as file_obj, transaction.atomic():
+            # Check the header before parsing the body
+            if not has_required_columns(file_obj):
+                raise ValueError(f'Missing columns. Required: {REQUIRED_COLUMNS}')
+
+            chunks = pd.read_csv(file_obj, usecols=REQUIRED_COLUMNS, dtype=CSV_DTYPES,
+                                 engine='c', chunksize=CSV_CHUNK_SIZE)
+            # Summaries are read far more often than datasets are written, so
+            # the stats are reduced from each chunk while it is in memory
+            totals = pd.Series(0.0, index=list(STAT_FIELDS))
+            counts = pd.Series(0, index=list(STAT_FIELDS))
+            type_counts = Counter()
+            for chunk in chunks:
+                insert_equipment(chunk, dataset_id)
+                numeric = chunk[list(STAT_FIELDS)]
+                totals += numeric.sum()
+                counts += numeric.count()
+                type_counts.update(chunk['Type'].value_counts().to_dict())
+
+            store_dataset_stats(dataset_id, totals, counts, type_counts)
+        return dataset_id
+
+    except Exception:
+        # Don't leave an empty dataset behind in the history
+        Dataset.objects.filter(pk=dataset_id).delete()
+        raise
+
+    finally:
+        # Drop any summary cached while the rows were still being inserted
+        invalidate_dataset_summary(dataset_id)
+        default_storage.delete(path)
+
+@shared_task
+def generate_pdf_report(file_id):
+    report = CachedFile.objects.select_related('dataset').get(pk=file_id)
+    try:
+        # Small reports stay in memory; larger ones spill to disk instead of
+        # being held whole, and storage copies the file over in chunks
+        with tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as buffer:
+            build_pdf_report(report.dataset, buffer)
+            buffer.seek(0)
+            report.file.save(f'{report.id}.pdf', File(buffer), save=False)
+
+        # Only the file is written back, and not if the report has already
+        # been expired while this task sat in the queue
+        if not CachedFile.objects.filter(pk=report.pk, error='').update(file=report.file.name):
+            report.file.delete(save=False)
+        return file_id
+
+    except Exception as e:
+        report.error = str(e)
+        report.save(update_fields=['error'])
+        raise
@@ -1,3 +1,296 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from backend.celery import app as celery_app
+from celery.backends.cache import CacheBackend
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import CachedFile, Dataset, Equipment
+from .reports import build_pdf_report
+from .tasks import CSV_DTYPES, REPORT_TIMEOUT, REPORT_TIMEOUT_ERROR, copy_equipment, generate_pdf_report, process_csv_upload
+import pandas as pd
+
+SAMPLE_CSV = (
+    b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+    b'Pump-101,Pump,150.0,2.0,40.0\n'
+    b'Pump-102,Pump,50.0,4.0,60.0\n'
+    b'Reactor-201,Reactor,1000.0,15.0,200.0\n'
+)
+
+# Tasks run in-process, keeping their results where AsyncResult can find them
+EAGER_TASKS = (process_csv_upload, generate_pdf_report)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    MEDIA_ROOT=MEDIA_ROOT,
+)
+class APITestBase(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.celery_conf = {
+            'task_always_eager': celery_app.conf.task_always_eager,
+            'task_store_eager_result': celery_app.conf.task_store_eager_result,
+        }
+        celery_app.conf.update(task_always_eager=True, task_store_eager_result=True)
+        # Tasks copy store_eager_result from the conf when they are bound, which
+        # may already have happened, and the app caches its result backend
+        result_backend = CacheBackend(app=celery_app, url='memory://')
+        for task in EAGER_TASKS:
+            task.backend = result_backend
+            task.store_eager_result = True
+
+    @classmethod
+    def tearDownClass(cls):
+        celery_app.conf.update(cls.celery_conf)
+        for task in EAGER_TASKS:
+            task.backend = None
+            del task.store_eager_result
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', 'tester@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name='equipment.csv'):
+        return self.client.post(
+            reverse('upload'), {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+
+    def ready_dataset(self):
+        response = self.upload(SAMPLE_CSV)
+        return Dataset.objects.get(pk=response.data['id'])
+
+class UploadTests(APITestBase):
+    def test_upload_stores_rows_and_stats(self):
+        response = self.upload(SAMPLE_CSV)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        result = self.client.get(response.data['status_url'])
+        self.assertEqual(result.data['status'], 'SUCCESS')
+        self.assertEqual(result.data['id'], response.data['id'])
+        self.assertEqual(result.data['rows'], 3)
+
+        dataset = Dataset.objects.get(pk=response.data['id'])
+        self.assertTrue(dataset.is_ready)
+        self.assertAlmostEqual(dataset.avg_flowrate, 400.0)
+        self.assertAlmostEqual(dataset.avg_pressure, 7.0)
+        self.assertAlmostEqual(dataset.avg_temperature, 100.0)
+        self.assertEqual(dataset.type_distribution, {'Pump': 2, 'Reactor': 1})
+        self.assertEqual(
+            list(dataset.equipment.order_by('id').values_list('name', flat=True)),
+            ['Pump-101', 'Pump-102', 'Reactor-201']
+        )
+        self.assertEqual(default_storage.listdir('uploads')[1], [])
+
+    def test_missing_column_is_rejected(self):
+        response = self.upload(b'Equipment Name,Type,Flowrate,Pressure\nPump-101,Pump,1.0,2.0\n')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Missing columns', response.data['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_bad_row_rolls_back_and_deletes_dataset(self):
+        bad_rows = {
+            'unparsable': b'Valve-401,Valve,abc,2.0,40.0\n',
+            'missing value': b'Valve-401,Valve,,2.0,40.0\n',
+        }
+        for label, bad_row in bad_rows.items():
+            with self.subTest(label), mock.patch('api.tasks.CSV_CHUNK_SIZE', 2):
+                # The bad row lands in the second chunk, after the first was inserted
+                response = self.upload(SAMPLE_CSV + bad_row)
+                self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+                result = self.client.get(response.data['status_url'])
+                self.assertEqual(result.data['status'], 'FAILURE')
+                self.assertFalse(Dataset.objects.filter(pk=response.data['id']).exists())
+                self.assertFalse(Equipment.objects.exists())
+
+    def test_enqueue_failure_cleans_up(self):
+        with mock.patch('api.views.process_csv_upload.delay', side_effect=ConnectionError('broker down')):
+            response = self.upload(SAMPLE_CSV)
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(Dataset.objects.exists())
+        self.assertEqual(default_storage.listdir('uploads')[1], [])
+
+class SummaryTests(APITestBase):
+    def test_summary_and_history(self):
+        dataset = self.ready_dataset()
+
+        response = self.client.get(reverse('summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], dataset.id)
+        self.assertEqual(len(response.data['data']), 3)
+        self.assertEqual(response.data['data'][0], {
+            'Equipment Name': 'Pump-101', 'Type': 'Pump',
+            'Flowrate': 150.0, 'Pressure': 2.0, 'Temperature': 40.0
+        })
+
+        response = self.client.get(reverse('summary'), {'limit': 1})
+        self.assertEqual(len(response.data['data']), 1)
+
+        for limit in ('x', '-1', '\u00b2'):
+            with self.subTest(limit=limit):
+                response = self.client.get(reverse('summary'), {'limit': limit})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('history'))
+        self.assertEqual([item['id'] for item in response.data], [dataset.id])
+        self.assertNotIn('data', response.data[0])
+
+    def test_ingesting_dataset_is_hidden(self):
+        dataset = self.ready_dataset()
+        pending = Dataset.objects.create(filename='pending.csv')
+
+        self.assertEqual(self.client.get(reverse('summary')).data['id'], dataset.id)
+        self.assertEqual(
+            self.client.get(reverse('summary-detail', args=[pending.id])).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual([item['id'] for item in self.client.get(reverse('history')).data], [dataset.id])
+
+    def test_conditional_get(self):
+        self.ready_dataset()
+
+        for name in ('summary', 'history'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name))
+                etag = response['ETag']
+
+                response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+                self.ready_dataset()
+                response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+class ReportTests(APITestBase):
+    def test_report_is_generated_and_reused(self):
+        dataset = self.ready_dataset()
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        file_id = response.data['file_id']
+
+        download = self.client.get(response.data['url'])
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(download['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['file_id'], file_id)
+
+    def test_markup_in_filename(self):
+        response = self.upload(SAMPLE_CSV, name='a<b & c.csv')
+        dataset = Dataset.objects.get(pk=response.data['id'])
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertEqual(self.client.get(response.data['url']).status_code, status.HTTP_200_OK)
+
+    def test_pending_report(self):
+        dataset = self.ready_dataset()
+        report = CachedFile.objects.create(dataset=dataset)
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['file_id'], report.id)
+
+        response = self.client.get(reverse('report-download', args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+
+    def test_stale_pending_report_is_replaced(self):
+        dataset = self.ready_dataset()
+        report = CachedFile.objects.create(dataset=dataset)
+        CachedFile.objects.filter(pk=report.id).update(
+            created_at=timezone.now() - REPORT_TIMEOUT - timedelta(minutes=1)
+        )
+
+        response = self.client.get(reverse('report-download', args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.data['status'], 'failed')
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertNotEqual(response.data['file_id'], report.id)
+        self.assertEqual(self.client.get(response.data['url']).status_code, status.HTTP_200_OK)
+
+    def test_expired_report_is_not_revived(self):
+        dataset = self.ready_dataset()
+        report = CachedFile.objects.create(dataset=dataset)
+
+        def expire_during_build(dataset, output):
+            # The view expires the report after the worker has loaded it
+            CachedFile.objects.filter(pk=report.id).update(error=REPORT_TIMEOUT_ERROR)
+            build_pdf_report(dataset, output)
+
+        with mock.patch('api.tasks.build_pdf_report', side_effect=expire_during_build):
+            generate_pdf_report(str(report.id))
+
+        report.refresh_from_db()
+        self.assertEqual(report.error, REPORT_TIMEOUT_ERROR)
+        self.assertFalse(report.file)
+        self.assertEqual(default_storage.listdir('reports')[1], [])
+
+    def test_ingesting_dataset_is_refused(self):
+        dataset = Dataset.objects.create(filename='pending.csv')
+
+        response = self.client.post(reverse('report', args=[dataset.id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(CachedFile.objects.exists())
+
+    def test_enqueue_failure_deletes_report(self):
+        dataset = self.ready_dataset()
+
+        with mock.patch('api.views.generate_pdf_report.delay', side_effect=ConnectionError('broker down')):
+            response = self.client.post(reverse('report', args=[dataset.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(CachedFile.objects.exists())
+
+# On PostgreSQL the upload tests above also go through COPY; these check
+# the CSV it is fed directly
+@skipUnless(connection.vendor == 'postgresql', 'COPY is only used on PostgreSQL')
+class CopyEquipmentTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='copy.csv')
+
+    def read_chunk(self, content):
+        return pd.read_csv(io.BytesIO(content), dtype=CSV_DTYPES)
+
+    def test_rows_are_copied(self):
+        copy_equipment(self.read_chunk(SAMPLE_CSV + b'"Valve ""A"", main",Valve,0.5,1.25,-3.0\n'), self.dataset.id)
+
+        self.assertEqual(
+            list(self.dataset.equipment.order_by('id').values_list('name', 'type', 'flowrate', 'pressure', 'temperature')),
+            [
+                ('Pump-101', 'Pump', 150.0, 2.0, 40.0),
+                ('Pump-102', 'Pump', 50.0, 4.0, 60.0),
+                ('Reactor-201', 'Reactor', 1000.0, 15.0, 200.0),
+                ('Valve "A", main', 'Valve', 0.5, 1.25, -3.0),
+            ]
+        )
+
+    def test_missing_value_is_copied_as_null(self):
+        # NaN must reach the database as NULL, not as a 'NaN' float
+        chunk = self.read_chunk(SAMPLE_CSV + b'Valve-401,Valve,,2.0,40.0\n')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            copy_equipment(chunk, self.dataset.id)
+        self.assertFalse(self.dataset.equipment.exists())
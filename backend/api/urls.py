@@ -1,12 +1,15 @@
 from django.urls import path
-from .views import UploadView, SummaryView, HistoryView, RegisterView, PDFReportView
+from .views import UploadView, UploadStatusView, SummaryView, HistoryView, RegisterView, PDFReportView, ReportDownloadView
 from rest_framework.authtoken import views
 
 urlpatterns = [
     path('upload/', UploadView.as_view(), name='upload'),
+    path('upload/status/<str:task_id>/', UploadStatusView.as_view(), name='upload-status'),
     path('summary/', SummaryView.as_view(), name='summary'),
+    path('summary/<int:pk>/', SummaryView.as_view(), name='summary-detail'),
     path('history/', HistoryView.as_view(), name='history'),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', views.obtain_auth_token, name='login'),
     path('report/<int:pk>/', PDFReportView.as_view(), name='report'),
+    path('reports/<uuid:file_id>/', ReportDownloadView.as_view(), name='report-download'),
 ]
@@ -2,11 +2,20 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from rest_framework import status
-from django.db.models import Avg, Count
-from .models import Dataset, Equipment
-from .serializers import DatasetSerializer, EquipmentSerializer
-import pandas as pd
-import io
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .models import CachedFile, Dataset, Equipment
+from .summary import build_summary, datasets_version, get_dataset_summary
+from .tasks import (
+    REPORT_TIMEOUT, REPORT_TIMEOUT_ERROR, REQUIRED_COLUMNS,
+    generate_pdf_report, has_required_columns, process_csv_upload
+)
+import uuid
 
 class UploadView(APIView):
     parser_classes = [MultiPartParser]
@@ -20,69 +29,80 @@ class UploadView(APIView):
         if not file_obj.name.endswith('.csv'):
             return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Reject malformed files from the header alone, before anything is stored
         try:
-            # Read CSV
-            df = pd.read_csv(file_obj)
-            
-            # Simple validation of headers
-            required_cols = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            if not all(col in df.columns for col in required_cols):
-                 return Response({'error': f'Missing columns. Required: {required_cols}'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create Dataset
-            dataset = Dataset.objects.create(filename=file_obj.name)
+            if not has_required_columns(file_obj):
+                return Response({'error': f'Missing columns. Required: {REQUIRED_COLUMNS}'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': f'Could not read CSV header: {e}'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Bulk create equipment
-            equipment_list = []
-            for _, row in df.iterrows():
-                equipment_list.append(Equipment(
-                    dataset=dataset,
-                    name=row['Equipment Name'],
-                    type=row['Type'],
-                    flowrate=row['Flowrate'],
-                    pressure=row['Pressure'],
-                    temperature=row['Temperature']
-                ))
-            
-            Equipment.objects.bulk_create(equipment_list)
-
-            return Response({'message': 'Upload successful', 'id': dataset.id}, status=status.HTTP_201_CREATED)
+        dataset = path = None
+        try:
+            # Parsing and inserts run in the worker; the request only stores the file
+            dataset = Dataset.objects.create(filename=file_obj.name)
+            path = default_storage.save(f'uploads/{uuid.uuid4().hex}.csv', file_obj)
+            task = process_csv_upload.delay(path, dataset.id)
 
         except Exception as e:
+            # Nothing will ever ingest the staged file if the task wasn't queued
+            if dataset is not None:
+                dataset.delete()
+            if path is not None:
+                default_storage.delete(path)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-def get_dataset_summary(dataset):
-    equipment = dataset.equipment.all()
-    
-    # Calculate stats
-    avg_flowrate = equipment.aggregate(Avg('flowrate'))['flowrate__avg'] or 0
-    avg_pressure = equipment.aggregate(Avg('pressure'))['pressure__avg'] or 0
-    avg_temperature = equipment.aggregate(Avg('temperature'))['temperature__avg'] or 0
-    
-    # Type distribution
-    type_counts = equipment.values('type').annotate(count=Count('type'))
-    type_distribution = {item['type']: item['count'] for item in type_counts}
-
-    data = EquipmentSerializer(equipment, many=True).data
-
-    return {
-        'id': dataset.id,
-        'filename': dataset.filename,
-        'upload_date': dataset.upload_date,
-        'avg_flowrate': avg_flowrate,
-        'avg_pressure': avg_pressure,
-        'avg_temperature': avg_temperature,
-        'type_distribution': type_distribution,
-        'data': data
-    }
+        return Response({
+            'message': 'Upload accepted',
+            'id': dataset.id,
+            'task_id': task.id,
+            'status_url': reverse('upload-status', args=[task.id])
+        }, status=status.HTTP_202_ACCEPTED)
+
+class UploadStatusView(APIView):
+    def get(self, request, task_id):
+        result = process_csv_upload.AsyncResult(task_id)
+        response_data = {'task_id': task_id, 'status': result.status}
+
+        if result.successful():
+            response_data['id'] = result.result
+            response_data['rows'] = Equipment.objects.filter(dataset_id=result.result).count()
+        elif result.failed():
+            response_data['error'] = str(result.result)
+
+        return Response(response_data)
+
+def datasets_etag(request, *args, **kwargs):
+    return str(datasets_version())
 
+# Clients revalidate with If-None-Match and get a 304 until a dataset is
+# added or finishes ingesting, without the view touching the database
+conditional_get = method_decorator(
+    [cache_control(private=True, no_cache=True), condition(etag_func=datasets_etag)], name='get'
+)
+
+@conditional_get
 class SummaryView(APIView):
-    def get(self, request):
-        latest_dataset = Dataset.objects.order_by('-upload_date').first()
-        if not latest_dataset:
-             return Response({'error': 'No data available'}, status=status.HTTP_404_NOT_FOUND)
+    def get(self, request, pk=None):
+        if pk is not None:
+            dataset = Dataset.objects.filter(pk=pk, is_ready=True).first()
+            if not dataset:
+                return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            dataset = Dataset.objects.filter(is_ready=True).order_by('-upload_date').first()
+            if not dataset:
+                return Response({'error': 'No data available'}, status=status.HTTP_404_NOT_FOUND)
         
-        summary = get_dataset_summary(latest_dataset)
+        # Optional ?limit=N returns only the first N equipment rows
+        data_limit = request.query_params.get('limit')
+        if data_limit is not None:
+            try:
+                data_limit = int(data_limit)
+                if data_limit < 0:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': 'limit must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = get_dataset_summary(dataset, include_data=True, data_limit=data_limit)
         return Response(summary)
 
 from django.contrib.auth.models import User
@@ -109,96 +129,63 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = (AllowAny,)
     serializer_class = RegisterSerializer
 
+@conditional_get
 class HistoryView(APIView):
     def get(self, request):
-        datasets = Dataset.objects.order_by('-upload_date')[:5]
-        # For history, frontend likely expects metadata + maybe summary. 
-        # Requirement: "Clicking a history item should load and display... summary, charts, table".
-        # So we should probably return full details for each history item or handle it lightly.
-        # Frontend code assumes history items have structure similar to summary? 
-        # Let's check frontend code assumption.
-        # Dashboard.js: `if (item.data && item.type_distribution)` -> Implies full data attached to history item list
-        
-        response_data = []
-        for ds in datasets:
-             response_data.append(get_dataset_summary(ds))
+        # Only the stored stats are listed; the dashboard loads a dataset's
+        # rows from /summary/<id>/ when a history item is clicked
+        datasets = Dataset.objects.filter(is_ready=True).order_by('-upload_date')[:5]
+        response_data = [build_summary(ds) for ds in datasets]
         
         return Response(response_data)
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from django.http import HttpResponse
+def expire_stale_reports(reports):
+    cutoff = timezone.now() - REPORT_TIMEOUT
+    reports.filter(file='', error='', created_at__lt=cutoff).update(error=REPORT_TIMEOUT_ERROR)
 
 class PDFReportView(APIView):
-    def get(self, request, pk):
+    def post(self, request, pk):
         try:
             dataset = Dataset.objects.get(pk=pk)
-            summary = get_dataset_summary(dataset)
-
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="report_{dataset.filename}.pdf"'
-
-            doc = SimpleDocTemplate(response, pagesize=letter)
-            styles = getSampleStyleSheet()
-            elements = []
-
-            # Title
-            elements.append(Paragraph(f"Parameter Report: {dataset.filename}", styles['Title']))
-            elements.append(Spacer(1, 12))
-            elements.append(Paragraph(f"Upload Date: {dataset.upload_date}", styles['Normal']))
-            elements.append(Spacer(1, 24))
-
-            # Summary Stats
-            elements.append(Paragraph("Summary Statistics", styles['Heading2']))
-            stats_data = [
-                ['Parameter', 'Average Value'],
-                ['Flowrate', f"{summary['avg_flowrate']:.2f}"],
-                ['Pressure', f"{summary['avg_pressure']:.2f}"],
-                ['Temperature', f"{summary['avg_temperature']:.2f}"]
-            ]
-            t_stats = Table(stats_data)
-            t_stats.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(t_stats)
-            elements.append(Spacer(1, 24))
-
-            # Equipment List (Top 20 for brevity)
-            elements.append(Paragraph("Equipment Data (Top 20)", styles['Heading2']))
-            eq_data = [['Name', 'Type', 'Flow', 'Press.', 'Temp.']]
-            for item in summary['data'][:20]:
-                 eq_data.append([
-                     item['Equipment Name'], 
-                     item['Type'], 
-                     f"{item['Flowrate']}", 
-                     f"{item['Pressure']}", 
-                     f"{item['Temperature']}"
-                 ])
-            
-            t_eq = Table(eq_data)
-            t_eq.setStyle(TableStyle([
-               ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-               ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-               ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-               ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-               ('FONTSIZE', (0, 0), (-1, -1), 8),
-               ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
-            ]))
-            elements.append(t_eq)
-
-            doc.build(elements)
-            return response
-            
         except Dataset.DoesNotExist:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # A report built mid-ingest would be empty and then reused for good
+        if not dataset.is_ready:
+            return Response({'error': 'Dataset is still being processed'}, status=status.HTTP_409_CONFLICT)
+
+        # Datasets never change after upload, so an existing report is reused
+        expire_stale_reports(dataset.reports)
+        report = dataset.reports.filter(error='').order_by('-created_at').first()
+        if report is None:
+            report = CachedFile.objects.create(dataset=dataset)
+            try:
+                generate_pdf_report.delay(str(report.id))
+            except Exception as e:
+                report.delete()
+                return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'file_id': report.id,
+            'url': reverse('report-download', args=[report.id])
+        }, status=status.HTTP_200_OK if report.file else status.HTTP_202_ACCEPTED)
+
+class ReportDownloadView(APIView):
+    def get(self, request, file_id):
+        expire_stale_reports(CachedFile.objects.filter(pk=file_id))
+        try:
+            report = CachedFile.objects.select_related('dataset').get(pk=file_id)
+        except CachedFile.DoesNotExist:
+            return Response({'error': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if report.error:
+            return Response({'status': 'failed', 'error': report.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not report.file:
+            return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+        return FileResponse(
+            report.file.open('rb'),
+            as_attachment=True,
+            filename=f'report_{report.dataset.filename}.pdf',
+            content_type='application/pdf'
+        )
@@ -1,7 +1,22 @@
 import React, { useState } from 'react';
 import { Upload, Button, message, Card } from 'antd';
 import { UploadOutlined } from '@ant-design/icons';
-import { uploadFile } from '../services/api';
+import { uploadFile, getUploadStatus } from '../services/api';
+
+const POLL_INTERVAL_MS = 1000;
+// Celery reports a lost or unknown task as PENDING forever, so give up eventually
+const MAX_POLLS = 300;
+
+// The backend ingests the CSV in a background task, so wait for it to finish
+const waitForIngest = async (taskId) => {
+    for (let attempt = 0; attempt < MAX_POLLS; attempt++) {
+        const { status, error } = await getUploadStatus(taskId);
+        if (status === 'SUCCESS') return;
+        if (status === 'FAILURE') throw new Error(error);
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+    throw new Error('Timed out waiting for the upload to be processed');
+};
 
 const UploadCSV = ({ onUploadSuccess }) => {
     const [uploading, setUploading] = useState(false);
@@ -9,7 +24,8 @@ const UploadCSV = ({ onUploadSuccess }) => {
     const handleUpload = async (file) => {
         setUploading(true);
         try {
-            await uploadFile(file);
+            const { task_id } = await uploadFile(file);
+            await waitForIngest(task_id);
             message.success('File uploaded successfully');
             if (onUploadSuccess) {
                 onUploadSuccess(); // Trigger parent refresh
@@ -45,35 +45,16 @@ const Dashboard = ({ onLogout }) => {
         fetchData(); // Refresh data after upload
     };
 
-    const handleHistoryClick = (item) => {
-        // In a real app, this might fetch specific dataset by ID. 
-        // For this requirements, the history item click "should load and display... summary, charts, table".
-        // The backend API `GET /summary/` implies *latest* but maybe we need to fetch a specific one?
-        // The instructions say "Clicking a history item should load and display...".
-        // The provided API only lists `GET /summary/` (latest) and `GET /history/`.
-        // If the backend doesn't support fetching by ID, we might only be able to show the latest.
-        // However, usually `GET /summary/` might accept a query param? or maybe the backend state updates?
-        // Given the constraints, I will assume `GET /summary/` retrieves the *current active* dataset,
-        // OR the history item itself contains the data?
-        // Re-reading: "GET /summary/ -> Latest dataset summary + data".
-        // So clicking history likely implies we can't switch view unless we re-upload or if the API supported it.
-        // BUT, if the user Requirement says "Clicking a history item should load and display...", I should try to support it.
-        // Maybe I can assume `item` *is* the data? 
-        // If `item` from history list is just metadata, and API lacks `GET /summary/:id`, I'm stuck.
-        // I will assume for now that sticking to `getSummary` (Latest) is the safe bet, 
-        // OR I implies `GET /summary/?id=...` which is common.
-        // But the requirement says "GET /summary/ -> Latest dataset". 
-        // It implies the backend tracks "Latest".
-        // I'll add a comment about this limitation or assume the history item has the data effectively.
-        // Let's assume the history object contains the summary data or I can set it directly if available.
-        // If not, I'll just refresh.
-
-        // Since history endpoints return summary compatible structure, we can just set data.
-        // Ideally we might want to fetch full details by ID if needed, but for now assuming summary is enough
-        // or re-fetching if structure differs.
-        // Actually, backend history uses get_dataset_summary, so structure is same.
-        setSummary(item);
-        window.scrollTo({ top: 0, behavior: 'smooth' });
+    const handleHistoryClick = async (item) => {
+        // History items only carry summary stats, so load the full dataset by id
+        try {
+            const summaryData = await getSummary(item.id);
+            setSummary(summaryData);
+            window.scrollTo({ top: 0, behavior: 'smooth' });
+        } catch (error) {
+            console.error(error);
+            message.error('Failed to load dataset');
+        }
     };
 
     const handleDownloadReport = async () => {
@@ -83,12 +83,27 @@ export const uploadFile = async (file) => {
 };
 
 /**
- * Fetch the latest dataset summary and data
+ * Poll the background ingest started by uploadFile
+ * @param {string} taskId - Task id returned by the upload endpoint
+ * @returns {Promise<Object>} - Task status, plus row count once finished
+ */
+export const getUploadStatus = async (taskId) => {
+    try {
+        const response = await api.get(`/upload/status/${taskId}/`);
+        return response.data;
+    } catch (error) {
+        throw error;
+    }
+};
+
+/**
+ * Fetch a dataset summary and data (the latest one if no id is given)
+ * @param {number} [id] - Dataset ID
  * @returns {Promise<Object>} - The summary data
  */
-export const getSummary = async () => {
+export const getSummary = async (id) => {
     try {
-        const response = await api.get('/summary/');
+        const response = await api.get(id ? `/summary/${id}/` : '/summary/');
         return response.data;
     } catch (error) {
         throw error;
@@ -96,7 +111,7 @@ export const getSummary = async () => {
 };
 
 /**
- * Fetch the last 5 uploaded datasets
+ * Fetch the last 5 uploaded datasets (summary stats only, no equipment rows)
  * @returns {Promise<Array>} - List of history items
  */
 export const getHistory = async () => {
@@ -108,17 +123,29 @@ export const getHistory = async () => {
     }
 };
 
+const REPORT_POLL_INTERVAL_MS = 1000;
+const REPORT_MAX_POLLS = 120;
+
 /**
  * Download PDF Report
+ * The report is generated in a background task, so this requests it
+ * and then polls the download URL until the file is ready.
  * @param {number} id - Dataset ID
  * @returns {Promise<Blob>} - PDF Blob
  */
 export const downloadReport = async (id) => {
     try {
-        const response = await api.get(`/report/${id}/`, {
-            responseType: 'blob', // Important for file download
-        });
-        return response.data;
+        const { data } = await api.post(`/report/${id}/`);
+        for (let attempt = 0; attempt < REPORT_MAX_POLLS; attempt++) {
+            const response = await api.get(`/reports/${data.file_id}/`, {
+                responseType: 'blob', // Important for file download
+            });
+            if (response.status === 200) {
+                return response.data;
+            }
+            await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL_MS));
+        }
+        throw new Error('Timed out waiting for the report');
     } catch (error) {
         throw error;
     }